@@ -35,26 +35,37 @@ import argparse
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('Wnck', '3.0')
-from gi.repository import Gtk, Gdk, GdkX11, Wnck
+from gi.repository import GLib, Gtk, Gdk, GdkX11, Wnck
 import cairo
 import Xlib.display
-from copy import copy
+import Xlib.Xatom
 
 progname = 'gridlock'
 version = '0.2.99'
 
-def get_gtk_frame_offset(xid):
+# lazily opened by get_gtk_frame_offset()
+_x11_display = None
+_atom_gtk_frame_extents = None
+
+def get_gtk_frame_offset(xid, debug=False):
+    global _x11_display, _atom_gtk_frame_extents
     #
     # Gdk and Wnck hide away _GTK_FRAME_EXTENTS, Gdk.property_get is broken,
-    # so use native Xlib to get this:
+    # so use native Xlib to get this. This is only called at startup and
+    # when the target changes state, not for every geometry update. Keep
+    # the connection and the atom around, and fetch exactly four
+    # CARDINALs in a single request:
     #
-    x11_display = Xlib.display.Display()
-    x11_window = x11_display.create_resource_object('window', target.get_xid())
-    atom_gtk_frame_extents = x11_display.intern_atom('_GTK_FRAME_EXTENTS')
-    prop = x11_window.get_full_property(atom_gtk_frame_extents, 0)
-    if prop is not None:
+    if _x11_display is None:
+        _x11_display = Xlib.display.Display()
+        _atom_gtk_frame_extents = \
+            _x11_display.intern_atom('_GTK_FRAME_EXTENTS')
+    x11_window = _x11_display.create_resource_object('window', xid)
+    prop = x11_window.get_property(
+        _atom_gtk_frame_extents, Xlib.Xatom.CARDINAL, 0, 4)
+    if prop is not None and len(prop.value) == 4:
         (left, right, top, bottom) = prop.value
-        if args.debug:
+        if debug:
             print(f'  _GTK_FRAME_EXTENTS detected: {(left, right, top, bottom)}')
         return (-left, -top, left + right, top + bottom)
     return (0, 0, 0, 0)
@@ -62,17 +73,30 @@ def get_gtk_frame_offset(xid):
 
 class Rect():
 
+    __slots__ = ('x1', 'y1', 'x2', 'y2', '_valid')
+
     def __init__(self, x1=None, y1=None, x2=None, y2=None):
         self.x1 = x1
         self.y1 = y1
         self.x2 = x2
         self.y2 = y2
+        self._valid = x1 is not None \
+            and y1 is not None \
+            and x2 is not None \
+            and y2 is not None
 
     def __bool__(self):
-        return self.x1 is not None \
-            and self.y1 is not None \
-            and self.x2 is not None \
-            and self.y2 is not None
+        return self._valid
+
+    def set_start(self, x, y):
+        self.x1 = x
+        self.y1 = y
+        self._valid = self.x2 is not None and self.y2 is not None
+
+    def set_end(self, x, y):
+        self.x2 = x
+        self.y2 = y
+        self._valid = self.x1 is not None and self.y1 is not None
 
     def __copy__(self):
         return type(self)(self.x1, self.y1, self.x2, self.y2)
@@ -83,30 +107,51 @@ class Rect():
                 == (other.x1, other.y1, other.x2, other.y2)
         return NotImplemented
 
-    def to_cairo(self, scale_x=1, scale_y=1):
-        x1 = min(self.x1, self.x2)
-        y1 = min(self.y1, self.y2)
-        x2 = max(self.x1, self.x2)
-        y2 = max(self.y1, self.y2)
+    def to_cairo(self, width=1, height=1, cols=1, rows=1):
+        (x1, x2) = (self.x1, self.x2)
+        if x1 > x2:
+            (x1, x2) = (x2, x1)
+        (y1, y2) = (self.y1, self.y2)
+        if y1 > y2:
+            (y1, y2) = (y2, y1)
+
+        # same integer arithmetic as for the grid lines
+        left = x1 * width // cols
+        top = y1 * height // rows
+        right = (1 + x2) * width // cols
+        bottom = (1 + y2) * height // rows
 
-        return map(int, (
-            x1 * scale_x,
-            y1 * scale_y,
-            (1 + x2 - x1) * scale_x,
-            (1 + y2 - y1) * scale_y,
-            ))
+        return (left, top, right - left, bottom - top)
 
 
 class GridLock(Gtk.Window):
 
-    def __init__(self, target):
+    def __init__(self, target, args):
         super().__init__(title='Gridlock')
 
         self.target = target
         (self.cols, self.rows) = args.grid
+
+        # options are fixed after startup, keep them close at hand
+        self._live_preview = args.live_preview
+        self._hi_color = args.hi_color
+        self._bg_color = args.bg_color
+        self._grid_color = args.grid_color
+        self._grid_thickness = args.grid_thickness
+        self._offset = args.offset
+        self._hide_cursor = args.hide_cursor
+        self._debug = args.debug
+        self._gravity = args.gravity
+
         self.drag = False
         self.wnck_window = None
+        self._grid_geometry = None
         self.cursor_rect = Rect()
+        # a fully transparent hilight color would never show up anyway
+        self._cursor_visible = self._hi_color[3] > 0
+        self._preview_pending = False
+        self._last_drawn_area = None
+        self._grid_surface = None
         self.connect('destroy', Gtk.main_quit)
         if args.fullscreen:
             self.fullscreen()
@@ -124,13 +169,22 @@ class GridLock(Gtk.Window):
         self.target_orig_maximized_vert = self.target.is_maximized_vertically()
         self.target_orig_maximized_horiz = self.target.is_maximized_horizontally()
         self.target_orig_maximized = self.target.is_maximized()
-        if args.debug:
+        if self._debug:
             print('Original window geometry:')
             print(f'  geometry = {self.target_orig_geometry}')
             print(f'  maximized_vert = {self.target_orig_maximized_vert}')
             print(f'  maximized_horiz = {self.target_orig_maximized_horiz}')
             print(f'  maximized = {self.target_orig_maximized}')
 
+        #
+        # Add up all offsets once instead of for every geometry update. The
+        # frame extents of client side decorations change with the window
+        # state (e.g. a maximized window has none), so refresh them when
+        # Wnck reports a state change of the target.
+        #
+        self.update_combined_offset()
+        self.target.connect('state-changed', self.on_target_state_changed)
+
         screen = self.get_screen()
         visual = screen.get_rgba_visual()
         if visual and screen.is_composited():
@@ -146,57 +200,60 @@ class GridLock(Gtk.Window):
             )
 
         self.set_app_paintable(True)
+        self.connect('realize', self.on_realize)
         self.connect('key-press-event',self.on_key_press)
         self.connect('button_press_event', self.on_mouse_press)
         self.connect('button_release_event', self.on_mouse_release)
         self.connect('motion_notify_event', self.on_mouse_move)
         self.connect('draw', self.on_draw_window)
 
-        overlay = Gtk.Overlay()
-
-        self.cursor = Gtk.DrawingArea()
-        self.cursor.connect('draw', self.on_draw_cursor)
-        overlay.add(self.cursor)
+        self.canvas = Gtk.DrawingArea()
+        self.canvas.connect('draw', self.on_draw_canvas)
+        self.canvas.connect('size-allocate', self.on_size_allocate)
+        self.add(self.canvas)
 
-        self.grid = Gtk.DrawingArea()
-        self.grid.connect('draw', self.on_draw_grid)
-        overlay.add_overlay(self.grid)
+    def update_combined_offset(self):
+        frame_offset = get_gtk_frame_offset(
+            self.target.get_xid(), debug=self._debug)
+        self._combined_offset = tuple(
+            a + b for (a, b) in zip(self._offset, frame_offset)
+            )
 
-        self.add(overlay)
+    def on_target_state_changed(self, wnck_window, changed_mask, new_state):
+        self.update_combined_offset()
 
     def set_target_geometry_from_cursor(self):
         if self.target.is_maximized():
             self.target.unmaximize()
 
-        allocation = self.grid.get_allocation()
-        cell_width = allocation.width / self.cols
-        cell_height = allocation.height / self.rows
-
-        (x, y, width, height) = self.cursor_rect.to_cairo(cell_width, cell_height)
-        (grid_x, grid_y, grid_width, grid_height) = self.wnck_window.get_geometry()
-
-        # translate grid coordinates to global coordinates
-        geometry = (x + grid_x, y + grid_y, width, height)
-
-        # apply offsets
-        geometry = tuple(sum(x) for x in zip(geometry, args.offset))
-        frame_offset = get_gtk_frame_offset(self.target.get_xid())
-        geometry = tuple(sum(x) for x in zip(geometry, frame_offset))
+        (x, y, width, height) = self.cursor_rect.to_cairo(
+            self._alloc_w, self._alloc_h, self.cols, self.rows)
+        (grid_x, grid_y, grid_width, grid_height) = self._grid_geometry
+
+        # translate grid coordinates to global coordinates and apply offsets
+        offset = self._combined_offset
+        geometry = (
+            x + grid_x + offset[0],
+            y + grid_y + offset[1],
+            width + offset[2],
+            height + offset[3],
+            )
 
-        if args.debug:
+        if self._debug:
             print('Compute new target geometry')
             print(f'  local target geometry = {(x, y, width, height)}')
             print(f'  grid geometry = {(grid_x, grid_y, grid_width, grid_height)}')
-            print(f'  offset = {args.offset}')
+            print(f'  offset = {self._offset}')
+            print(f'  combined offset = {offset}')
             print(f'  translated geometry = {geometry}')
 
         self.set_raw_target_geometry(*geometry)
 
     def set_raw_target_geometry(self, x, y, width, height):
-        if args.debug:
+        if self._debug:
             print(f'Calling Wnck.Window.set_geometry() with {(x, y, width, height)}')
         self.target.set_geometry(
-            args.gravity,
+            self._gravity,
             Wnck.WindowMoveResizeMask.X
             | Wnck.WindowMoveResizeMask.Y
             | Wnck.WindowMoveResizeMask.WIDTH
@@ -207,6 +264,19 @@ class GridLock(Gtk.Window):
             height,
             )
 
+    def on_realize(self, window):
+        #
+        # Gdk compresses motion events by default, which may swallow the
+        # last position of a fast drag. Take every event and coalesce
+        # expensive work ourselves, see on_mouse_move().
+        #
+        self.get_window().set_event_compression(False)
+
+    def on_grid_geometry_changed(self, wnck_window):
+        self._grid_geometry = tuple(wnck_window.get_geometry())
+        if self._debug:
+            print(f'Grid window geometry changed to {self._grid_geometry}')
+
     def on_draw_window(self, window, ctx):
         #
         # instead of waiting for the Gdk.Window and installing an
@@ -218,61 +288,102 @@ class GridLock(Gtk.Window):
             # this may not work on the first 'draw' event...
             self.wnck_window = Wnck.Window.get(xid)
             if self.wnck_window is not None:
-                if args.debug:
+                if self._debug:
                     print(f'Grid window 0x{xid} is on screen, setting window type')
                 self.wnck_window.set_window_type(Wnck.WindowType.UTILITY)
-            elif args.debug:
+                #
+                # the grid window does not move while dragging, so only
+                # track its geometry when Wnck tells us it has changed
+                #
+                self._grid_geometry = tuple(self.wnck_window.get_geometry())
+                self.wnck_window.connect(
+                    'geometry-changed',
+                    self.on_grid_geometry_changed,
+                    )
+            elif self._debug:
                 print(f'Could not get window by xid 0x{xid}, retrying...')
         #
-        # make window transparent without affecting child widgets
+        # make window transparent without affecting child widgets, but
+        # only clear the area that is actually being redrawn
         #
+        (x1, y1, x2, y2) = ctx.clip_extents()
         ctx.set_source_rgba(0, 0, 0, 0)
         ctx.set_operator(cairo.OPERATOR_SOURCE)
-        ctx.paint()
+        ctx.rectangle(x1, y1, x2 - x1, y2 - y1)
+        ctx.fill()
         ctx.set_operator(cairo.OPERATOR_OVER)
 
-    def on_draw_cursor(self, cursor, ctx):
-        allocation = self.grid.get_allocation()
-        cell_width = allocation.width / self.cols
-        cell_height = allocation.height / self.rows
+    def on_size_allocate(self, area, allocation):
+        #
+        # cache the grid geometry, so we don't have to query the allocation
+        # on every motion and draw event
+        #
+        self._alloc_w = allocation.width
+        self._alloc_h = allocation.height
+        # the grid is rendered again on the next 'draw' event
+        self._grid_surface = None
 
-        if self.cursor_rect:
-            ctx.set_source_rgba(*args.hi_color)
+    def on_draw_canvas(self, canvas, ctx):
+        #
+        # cursor and grid share a single widget, the grid is painted on top
+        # of the cursor rectangle
+        #
+        self.draw_cursor(ctx)
+        self.draw_grid(ctx)
+
+    def draw_cursor(self, ctx):
+        if self._cursor_visible and self.cursor_rect:
+            ctx.set_source_rgba(*self._hi_color)
             ctx.rectangle(
-                *self.cursor_rect.to_cairo(cell_width, cell_height)
+                *self.cursor_rect.to_cairo(
+                    self._alloc_w, self._alloc_h, self.cols, self.rows)
                 )
             ctx.fill()
 
-    def on_draw_grid(self, area, ctx):
-        allocation = area.get_allocation()
-        width = allocation.width
-        height = allocation.height
+    def draw_grid(self, ctx):
+        #
+        # the grid does not change unless the canvas is resized, so render
+        # it once and just paint the cached surface afterwards
+        #
+        if self._grid_surface is None:
+            self._grid_surface = self.create_grid_surface()
+        ctx.set_source_surface(self._grid_surface, 0, 0)
+        ctx.paint()
+
+    def create_grid_surface(self):
+        width = self._alloc_w
+        height = self._alloc_h
+        surface = self.canvas.get_window().create_similar_surface(
+            cairo.CONTENT_COLOR_ALPHA, width, height)
+        ctx = cairo.Context(surface)
 
-        ctx.set_source_rgba(*args.bg_color)
+        ctx.set_source_rgba(*self._bg_color)
         ctx.rectangle(0, 0, width, height)
         ctx.fill()
 
-        ctx.set_source_rgba(*args.grid_color)
-        ctx.set_line_width(args.grid_thickness)
+        ctx.set_source_rgba(*self._grid_color)
+        ctx.set_line_width(self._grid_thickness)
         ctx.set_line_join(cairo.LINE_JOIN_ROUND)
 
+        # collect all grid lines into a single path and stroke it once
         for i in range(1, self.cols):
             x = i * width // self.cols
             ctx.move_to(x, 0)
             ctx.line_to(x, height-1)
-            ctx.stroke()
 
         for i in range(1, self.rows):
             y = i * height // self.rows
             ctx.move_to(0, y)
             ctx.line_to(width-1, y)
-            ctx.stroke()
+
+        ctx.stroke()
+        return surface
 
     def on_key_press(self, widget, event):
         if event.keyval == Gdk.KEY_q or event.keyval == Gdk.KEY_Escape:
-            if args.debug:
+            if self._debug:
                 print(f'Move-resize aborted by key press event {event.keyval}')
-            if args.live_preview:
+            if self._live_preview:
                 self.restore_target_geometry()
             Gtk.main_quit()
             return True
@@ -280,14 +391,13 @@ class GridLock(Gtk.Window):
     def on_mouse_press(self, widget, event):
         if event.button == 1:
             self.drag = True
-            self.last_cursor_rect = copy(self.cursor_rect)
-            if args.debug:
+            if self._debug:
                 print(f'Dragging mode started')
             return True
         else:
-            if args.debug:
+            if self._debug:
                 print(f'Move-resize aborted by mouse press event {event.button}')
-            if args.live_preview:
+            if self._live_preview:
                 self.restore_target_geometry()
             Gtk.main_quit()
             return True
@@ -300,26 +410,64 @@ class GridLock(Gtk.Window):
             return True
 
     def on_mouse_move(self, widget, event):
-        allocation = self.grid.get_allocation()
-        cell_width = allocation.width / self.cols
-        cell_height = allocation.height / self.rows
+        #
+        # Map pixels to cells as the exact inverse of the grid line placement
+        # (cell c starts at c * width // cols). While dragging, the implicit
+        # grab delivers coordinates outside of the grid window, so keep the
+        # cursor within the grid.
+        #
+        x = ((int(event.x) + 1) * self.cols - 1) // self._alloc_w
+        y = ((int(event.y) + 1) * self.rows - 1) // self._alloc_h
+        x = max(0, min(self.cols - 1, x))
+        y = max(0, min(self.rows - 1, y))
+
+        #
+        # most motion events do not leave the current cell, nothing to do
+        # then. When not dragging, x1/y1 always equal x2/y2.
+        #
+        if x == self.cursor_rect.x2 and y == self.cursor_rect.y2:
+            return False
 
         if self.drag:
-            self.cursor_rect.x2 = int(event.x / cell_width)
-            self.cursor_rect.y2 = int(event.y / cell_height)
-            if args.live_preview:
-                if args.hide_cursor:
-                    self.cursor.set_visible(False)
-                if self.last_cursor_rect != self.cursor_rect:
-                    if args.debug:
-                        print('Live preview redraw triggered')
-                    self.last_cursor_rect = copy(self.cursor_rect)
-                    self.set_target_geometry_from_cursor()
+            self.cursor_rect.set_end(x, y)
+            if self._live_preview:
+                if self._hide_cursor and self._cursor_visible:
+                    self._cursor_visible = False
+                    self.canvas.queue_draw()
+                #
+                # coalesce bursts of motion events into a single
+                # geometry change once the main loop becomes idle
+                #
+                if not self._preview_pending:
+                    self._preview_pending = True
+                    GLib.idle_add(
+                        self._flush_preview,
+                        priority=GLib.PRIORITY_DEFAULT_IDLE,
+                        )
         else:
-            self.cursor_rect.x1 = self.cursor_rect.x2 = int(event.x / cell_width)
-            self.cursor_rect.y1 = self.cursor_rect.y2 = int(event.y / cell_height)
+            self.cursor_rect.set_start(x, y)
+            self.cursor_rect.set_end(x, y)
 
-        self.cursor.queue_draw()
+        #
+        # only invalidate the areas covered by the previous and the current
+        # cursor rectangle, GTK merges them into a single damage region.
+        # Nothing needs to be redrawn if the cursor is not shown at all.
+        #
+        if self._cursor_visible and self.cursor_rect:
+            area = self.cursor_rect.to_cairo(
+                self._alloc_w, self._alloc_h, self.cols, self.rows)
+            if area != self._last_drawn_area:
+                if self._last_drawn_area is not None:
+                    self.canvas.queue_draw_area(*self._last_drawn_area)
+                self.canvas.queue_draw_area(*area)
+                self._last_drawn_area = area
+
+    def _flush_preview(self):
+        if self._debug:
+            print('Live preview redraw triggered')
+        self._preview_pending = False
+        self.set_target_geometry_from_cursor()
+        return False
 
     def restore_target_geometry(self):
         self.set_raw_target_geometry(*self.target_orig_geometry)
@@ -342,170 +490,179 @@ def parse_color_spec(arg_string):
             raise ValueError(f'Invalid color specification "{arg_string}"')
     return color_spec
 
-#
-# parse command line arguments
-#
-arg_parser = argparse.ArgumentParser(
-    prog = progname,
-    description = '',
-    epilog = 'Specify color components as floats [0.0, 1.0], e.g.'
-        ' "0.5,0.8,1.0,0.8" for\nlight sky blue with 80% opacity.\n\n'
-        'Caveat: This tool uses RGBA visuals. Compositor needed.',
-    formatter_class = argparse.RawDescriptionHelpFormatter,
-    )
-arg_parser.add_argument('window_id',
-    action='store', nargs='?',
-    help='X11 window id of the target window, defaulting to active window'
-        ' if not specified',
-    )
-arg_parser.add_argument('-d', '--debug',
-    dest='debug', action='store_true',
-    help='generate debug output, lots of',
-    )
-arg_parser.add_argument('-v', '--version',
-    action='version', version=f'This is {progname} version {version}.',
-    help='print version information and terminate',
-    )
-arg_parser.add_argument('-w', '--window-gravity', '--gravity',
-    dest='gravity', action='store',
-    help='specify gravity for window geometry changes: "current", "northwest"'
-        ' or "static", default is "current"',
-    )
-arg_parser.add_argument('-p', '--live-preview',
-    dest='live_preview', action='store_true',
-    help='show a live preview of the window while resizing, may cause trouble'
-        ' if the X11 client does not respond well to rapid geometry changes'
-    )
-arg_parser.add_argument('-H', '--hide-cursor',
-    dest='hide_cursor', action='store_true',
-    help='hide the cursor rectangle in live preview mode'
-    )
-arg_parser.add_argument('-f', '--fullscreen',
-    dest='fullscreen', action='store_true',
-    help='use fullscreen mode instead of a maximized undecorated window',
-    )
-arg_parser.add_argument('-o', '--offset',
-    dest='offset', action='store',
-    help='add offset to target geometry for WM decorated windows:'
-        ' "x_offset,y_offset[,width_offset,height_offset]", can be negative',
-    )
-arg_parser.add_argument('-O', '--offset-csd',
-    dest='offset_csd', action='store',
-    help='like "-o" but for windows with client side decorations',
-    )
-arg_parser.add_argument('-g', '--grid',
-    dest='grid', action='store',
-    help='specify grid as "columns,rows"',
-    )
-arg_parser.add_argument('-c', '--grid-color',
-    dest='grid_color', action='store',
-    help='grid color as "red,green,blue[,opacity]"',
-    )
-arg_parser.add_argument('-b', '--background-color', '--bg-color',
-    dest='bg_color', action='store',
-    help='background color as "red,green,blue[,opacity]"',
-    )
-arg_parser.add_argument('-l', '--hilight-color', '--hi-color',
-    dest='hi_color', action='store',
-    help='hilight color as "red,green,blue[,opacity]"',
-    )
-arg_parser.add_argument('-t', '--grid-thickness', 
-    dest='grid_thickness', action='store',
-    help='thickness of the lines of the grid lines in pixels'
-    )
-
-args = arg_parser.parse_args()
-
-screen = Wnck.Screen.get_default()
-screen.force_update()
-active_window = screen.get_active_window()
-
-if args.window_id is None:
-    target = active_window
-    if target is None:
-        raise RuntimeError('Could not determine active window')
-else:
-    target = Wnck.Window.get(int(args.window_id, 0))
-    if target is None:
-        raise RuntimeError(f'Could not get window for id {args.window_id}')
-
-is_undecorated = target.get_geometry() == target.get_client_window_geometry()
-
-#
-# parse grid specification
-#
-if args.grid is not None:
-    args.grid = tuple(int(i) for i in args.grid.split(','))
-else:
-    args.grid = (16, 10)
-
-#
-# parse offset specification
-#
-if is_undecorated:
-    # keep this ugly hack until we have proper config handling
-    args.offset = args.offset_csd
-
-if args.offset is not None:
-    args.offset = tuple(int(i) for i in args.offset.split(','))
-    # zero-pad to four elements
-    args.offset += (0,) * (4 - len(args.offset))
-else:
-    args.offset = (0, 0, 0, 0)
-
-#
-# parse gravity specification
-#
-if args.gravity is not None:
-    args.gravity = getattr(Wnck.WindowGravity, args.gravity.upper())
-else:
-    args.gravity = Wnck.WindowGravity.CURRENT
-
-#
-# parse color specifications
-#
-if args.grid_color is not None:
-    args.grid_color = parse_color_spec(args.grid_color)
-else:
-    args.grid_color = (.0, .4, 1.0, .8)
-
-if args.bg_color is not None:
-    args.bg_color = parse_color_spec(args.bg_color)
-else:
-    args.bg_color = (.0, .0, .0, .2)
-
-if args.hi_color is not None:
-    args.hi_color = parse_color_spec(args.hi_color)
-else:
-    args.hi_color = (1.0, 1.0, 1.0, .3)
-
-if args.grid_thickness is not None:
-    args.grid_thickness = int(args.grid_thickness)
-else:
-    args.grid_thickness = 7
-
-if args.debug:
-    print(f'Target window is 0x{target.get_xid():x}')
-    print(f'  name = "{target.get_name()}"')
-    print(f'  class group = "{target.get_class_group_name()}"')
-    print(f'  type = "{target.get_window_type()}"')
-    print(f'  is undecorated = {is_undecorated}')
-
-if target.get_window_type() != Wnck.WindowType.NORMAL:
+def main():
+    #
+    # parse command line arguments
+    #
+    arg_parser = argparse.ArgumentParser(
+        prog = progname,
+        description = '',
+        epilog = 'Specify color components as floats [0.0, 1.0], e.g.'
+            ' "0.5,0.8,1.0,0.8" for\nlight sky blue with 80% opacity.\n\n'
+            'Caveat: This tool uses RGBA visuals. Compositor needed.',
+        formatter_class = argparse.RawDescriptionHelpFormatter,
+        )
+    arg_parser.add_argument('window_id',
+        action='store', nargs='?',
+        help='X11 window id of the target window, defaulting to active window'
+            ' if not specified',
+        )
+    arg_parser.add_argument('-d', '--debug',
+        dest='debug', action='store_true',
+        help='generate debug output, lots of',
+        )
+    arg_parser.add_argument('-v', '--version',
+        action='version', version=f'This is {progname} version {version}.',
+        help='print version information and terminate',
+        )
+    arg_parser.add_argument('-w', '--window-gravity', '--gravity',
+        dest='gravity', action='store',
+        help='specify gravity for window geometry changes: "current", "northwest"'
+            ' or "static", default is "current"',
+        )
+    arg_parser.add_argument('-p', '--live-preview',
+        dest='live_preview', action='store_true',
+        help='show a live preview of the window while resizing, may cause trouble'
+            ' if the X11 client does not respond well to rapid geometry changes'
+        )
+    arg_parser.add_argument('-H', '--hide-cursor',
+        dest='hide_cursor', action='store_true',
+        help='hide the cursor rectangle in live preview mode'
+        )
+    arg_parser.add_argument('-f', '--fullscreen',
+        dest='fullscreen', action='store_true',
+        help='use fullscreen mode instead of a maximized undecorated window',
+        )
+    arg_parser.add_argument('-o', '--offset',
+        dest='offset', action='store',
+        help='add offset to target geometry for WM decorated windows:'
+            ' "x_offset,y_offset[,width_offset,height_offset]", can be negative',
+        )
+    arg_parser.add_argument('-O', '--offset-csd',
+        dest='offset_csd', action='store',
+        help='like "-o" but for windows with client side decorations',
+        )
+    arg_parser.add_argument('-g', '--grid',
+        dest='grid', action='store',
+        help='specify grid as "columns,rows"',
+        )
+    arg_parser.add_argument('-c', '--grid-color',
+        dest='grid_color', action='store',
+        help='grid color as "red,green,blue[,opacity]"',
+        )
+    arg_parser.add_argument('-b', '--background-color', '--bg-color',
+        dest='bg_color', action='store',
+        help='background color as "red,green,blue[,opacity]"',
+        )
+    arg_parser.add_argument('-l', '--hilight-color', '--hi-color',
+        dest='hi_color', action='store',
+        help='hilight color as "red,green,blue[,opacity]"',
+        )
+    arg_parser.add_argument('-t', '--grid-thickness', 
+        dest='grid_thickness', action='store',
+        help='thickness of the lines of the grid lines in pixels'
+        )
+
+    args = arg_parser.parse_args()
+
+    #
+    # parse grid specification
+    #
+    if args.grid is not None:
+        args.grid = tuple(int(i) for i in args.grid.split(','))
+    else:
+        args.grid = (16, 10)
+
+    #
+    # parse gravity specification
+    #
+    if args.gravity is not None:
+        args.gravity = getattr(Wnck.WindowGravity, args.gravity.upper())
+    else:
+        args.gravity = Wnck.WindowGravity.CURRENT
+
+    #
+    # parse color specifications
+    #
+    if args.grid_color is not None:
+        args.grid_color = parse_color_spec(args.grid_color)
+    else:
+        args.grid_color = (.0, .4, 1.0, .8)
+
+    if args.bg_color is not None:
+        args.bg_color = parse_color_spec(args.bg_color)
+    else:
+        args.bg_color = (.0, .0, .0, .2)
+
+    if args.hi_color is not None:
+        args.hi_color = parse_color_spec(args.hi_color)
+    else:
+        args.hi_color = (1.0, 1.0, 1.0, .3)
+
+    if args.grid_thickness is not None:
+        args.grid_thickness = int(args.grid_thickness)
+    else:
+        args.grid_thickness = 7
+
+    #
+    # Only talk to the X server once all of the cheap checks above have
+    # passed. Wnck.Window.get() needs a populated screen, too, so we cannot
+    # skip force_update() even if a window id was given.
+    #
+    screen = Wnck.Screen.get_default()
+    screen.force_update()
+    active_window = screen.get_active_window()
+
+    if args.window_id is None:
+        target = active_window
+        if target is None:
+            raise RuntimeError('Could not determine active window')
+    else:
+        target = Wnck.Window.get(int(args.window_id, 0))
+        if target is None:
+            raise RuntimeError(f'Could not get window for id {args.window_id}')
+
+    is_undecorated = target.get_geometry() == target.get_client_window_geometry()
+
+    #
+    # parse offset specification
+    #
+    if is_undecorated:
+        # keep this ugly hack until we have proper config handling
+        args.offset = args.offset_csd
+
+    if args.offset is not None:
+        args.offset = tuple(int(i) for i in args.offset.split(','))
+        # zero-pad to four elements
+        args.offset += (0,) * (4 - len(args.offset))
+    else:
+        args.offset = (0, 0, 0, 0)
+
     if args.debug:
-        print('Window type is not Wnck.WindowType.NORMAL, terminating...')
-    sys.exit(0)
-
-gridlock = GridLock(target)
-gridlock.show_all()
-Gtk.main()
-
-if active_window is not None:
-    now = GdkX11.x11_get_server_time(
-        GdkX11.X11Window.lookup_for_display(
-            Gdk.Display.get_default(),
-            GdkX11.x11_get_default_root_xwindow()
+        print(f'Target window is 0x{target.get_xid():x}')
+        print(f'  name = "{target.get_name()}"')
+        print(f'  class group = "{target.get_class_group_name()}"')
+        print(f'  type = "{target.get_window_type()}"')
+        print(f'  is undecorated = {is_undecorated}')
+
+    if target.get_window_type() != Wnck.WindowType.NORMAL:
+        if args.debug:
+            print('Window type is not Wnck.WindowType.NORMAL, terminating...')
+        sys.exit(0)
+
+    gridlock = GridLock(target, args)
+    gridlock.show_all()
+    Gtk.main()
+
+    if active_window is not None:
+        now = GdkX11.x11_get_server_time(
+            GdkX11.X11Window.lookup_for_display(
+                Gdk.Display.get_default(),
+                GdkX11.x11_get_default_root_xwindow()
+                )
             )
-        )
-    active_window.activate(now)
+        active_window.activate(now)
+
 
+if __name__ == '__main__':
+    main()